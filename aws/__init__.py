@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
 from .connection import Connection
 from .emr_instance import EMRInstance
-from .s3_manager import S3Manager
\ No newline at end of file
+from .s3_manager import S3Manager
+from .resource_planner import ResourcePlanner
+from .placement_policy import PlacementPolicy
\ No newline at end of file
@@ -3,18 +3,35 @@ import boto3
 
 class Connection:
 
-    def __init__(self):
-        '''Connection Instance'''
-        #self.region = 'eu-west-1'
+    def __init__(self, region=None):
+        '''
+        Connection Instance
+        :param region: Optional default AWS region e.g. 'eu-west-1'. If not given the region from the environment is used
+        '''
+        self.region = region
+        self.s3_connections = {}
+        self.emr_connections = {}
 
 
-    def s3_connection(self):
-        '''Create and return an EC2 connection'''
-        s3 = boto3.resource('s3')
-        return s3
+    def s3_connection(self, region=None):
+        '''
+        Create and return an S3 connection. Connections are cached so each region only gets one handle
+        :param region: Optional AWS region, defaults to the region of the Connection instance
+        :return: An S3 resource for the region
+        '''
+        region = region or self.region
+        if region not in self.s3_connections:
+            self.s3_connections[region] = boto3.resource('s3', region_name=region)
+        return self.s3_connections[region]
 
 
-    def emr_connection(self):
-        '''Create and return an EMR connection'''
-        emr = boto3.client('emr')
-        return emr
\ No newline at end of file
+    def emr_connection(self, region=None):
+        '''
+        Create and return an EMR connection. Connections are cached so each region only gets one handle
+        :param region: Optional AWS region, defaults to the region of the Connection instance
+        :return: An EMR client for the region
+        '''
+        region = region or self.region
+        if region not in self.emr_connections:
+            self.emr_connections[region] = boto3.client('emr', region_name=region)
+        return self.emr_connections[region]
\ No newline at end of file
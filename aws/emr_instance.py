@@ -6,6 +6,9 @@ logging.basicConfig()
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Upper limit for Task group auto scaling when no max_task_instance_count is given
+DEFAULT_MAX_TASK_INSTANCE_COUNT = 10
+
 class EMRInstance:
 
     def __init__(self):
@@ -57,6 +60,18 @@ class EMRInstance:
         return dict(zip(instance_group_types, instance_group_ids))
 
 
+    def get_instance_type(self, conn, cluster_id, instance_group_type='CORE'):
+        '''
+        Gets the EC2 instance type of an instance group in an EMR cluster
+        :param conn: An instance of EMR connection object from Connection class
+        :param cluster_id: The cluster Id of the EMR cluster
+        :param instance_group_type: The instance group type e.g. MASTER, CORE or TASK - default is CORE
+        :return: The EC2 instance type e.g. m3.xlarge
+        '''
+        instanceGroups = conn.list_instance_groups(ClusterId=cluster_id)['InstanceGroups']
+        return [i['InstanceType'] for i in instanceGroups if i['InstanceGroupType'] == instance_group_type][0]
+
+
     def get_master_ec2_instance_id(self, conn, cluster_id):
         '''
         Gets the EC2 instance ID of the Master node in EMR cluster
@@ -102,6 +117,177 @@ class EMRInstance:
         conn.modify_instance_groups(ClusterId=cluster_id, InstanceGroups=[{'InstanceGroupId': group_id, 'InstanceCount': instance_count}])
 
 
+    def get_active_step_count(self, conn, cluster_id):
+        '''
+        Gets the number of steps that are queued or running on an EMR cluster
+        :param conn: An instance of EMR connection object from Connection class
+        :param cluster_id: The cluster Id of the EMR cluster
+        :return: The number of steps in PENDING or RUNNING state
+        '''
+        step_count = 0
+        paginator = conn.get_paginator('list_steps')
+        for page in paginator.paginate(ClusterId=cluster_id, StepStates=['PENDING', 'RUNNING']):
+            step_count += len(page['Steps'])
+
+        logger.info("Active steps on {}: {}".format(cluster_id, step_count))
+        return step_count
+
+
+    def get_target_instance_count(self, requested_instance_count, active_instance_count, active_step_count):
+        '''
+        Works out how many worker nodes a cluster should have before a new step is submitted. While other steps are
+        queued or running the cluster is never shrunk below its current size; once the cluster is idle it is sized
+        to the new step alone
+        :param requested_instance_count: The number of worker nodes the new step needs
+        :param active_instance_count: The number of worker nodes (Core + Task) currently requested on the cluster
+        :param active_step_count: The number of steps queued or running on the cluster
+        :return: The target number of worker nodes
+        '''
+        if active_step_count:
+            return max(requested_instance_count, active_instance_count)
+        return requested_instance_count
+
+
+    def get_task_auto_scaling_policy(self, max_instance_count):
+        '''
+        Builds an automatic scaling policy for a Task instance group. The group grows while YARN has pending
+        containers and is shrunk back to zero once no applications are running
+        :param max_instance_count: The maximum number of nodes the Task group can scale out to
+        :return: An AutoScalingPolicy dictionary that can be attached to an instance group
+        '''
+        return {
+            'Constraints': {
+                'MinCapacity': 0,
+                'MaxCapacity': max_instance_count
+            },
+            'Rules': [
+                {
+                    'Name': 'scale-out-on-pending-containers',
+                    'Action': {
+                        'SimpleScalingPolicyConfiguration': {
+                            'AdjustmentType': 'CHANGE_IN_CAPACITY',
+                            'ScalingAdjustment': 1,
+                            'CoolDown': 300
+                        }
+                    },
+                    'Trigger': {
+                        'CloudWatchAlarmDefinition': {
+                            'ComparisonOperator': 'GREATER_THAN',
+                            'EvaluationPeriods': 1,
+                            'MetricName': 'ContainerPendingRatio',
+                            'Namespace': 'AWS/ElasticMapReduce',
+                            'Period': 300,
+                            'Statistic': 'AVERAGE',
+                            'Threshold': 0.75,
+                            'Unit': 'COUNT'
+                        }
+                    }
+                },
+                {
+                    'Name': 'scale-in-when-no-apps-running',
+                    'Action': {
+                        'SimpleScalingPolicyConfiguration': {
+                            'AdjustmentType': 'EXACT_CAPACITY',
+                            'ScalingAdjustment': 0,
+                            'CoolDown': 300
+                        }
+                    },
+                    'Trigger': {
+                        'CloudWatchAlarmDefinition': {
+                            'ComparisonOperator': 'LESS_THAN_OR_EQUAL',
+                            'EvaluationPeriods': 3,
+                            'MetricName': 'AppsRunning',
+                            'Namespace': 'AWS/ElasticMapReduce',
+                            'Period': 300,
+                            'Statistic': 'AVERAGE',
+                            'Threshold': 0,
+                            'Unit': 'COUNT'
+                        }
+                    }
+                }
+            ]
+        }
+
+
+    def add_task_instance_group(self, conn, cluster_id, instance_type, instance_count, max_instance_count=None):
+        '''
+        Adds a Task instance group to a running cluster. If the cluster was launched with an auto scaling role an
+        automatic scaling policy is attached so the group shrinks back once the cluster is idle
+        :param conn: An instance of EMR connection object from Connection class
+        :param cluster_id: The cluster Id of the EMR cluster
+        :param instance_type: The EC2 instance type to be used for the Task nodes
+        :param instance_count: The number of Task nodes to start with
+        :param max_instance_count: The maximum number of nodes the Task group can scale out to - default is the
+                                   larger of DEFAULT_MAX_TASK_INSTANCE_COUNT and instance_count
+        :return: The Group Id of the new Task instance group
+        '''
+        instance_group = {
+            'Name': "Task nodes",
+            'Market': 'ON_DEMAND',
+            'InstanceRole': 'TASK',
+            'InstanceType': instance_type,
+            'InstanceCount': instance_count,
+        }
+
+        cluster = conn.describe_cluster(ClusterId=cluster_id)['Cluster']
+        if cluster.get('AutoScalingRole'):
+            if not max_instance_count:
+                max_instance_count = max(DEFAULT_MAX_TASK_INSTANCE_COUNT, instance_count)
+            instance_group['AutoScalingPolicy'] = self.get_task_auto_scaling_policy(max_instance_count)
+
+        response = conn.add_instance_groups(JobFlowId=cluster_id, InstanceGroups=[instance_group])
+        return response['InstanceGroupIds'][0]
+
+
+    def resize_for_demand(self, conn, cluster_id, instance_count, instance_type, max_task_instance_count=None):
+        '''
+        Resizes the Task instance group of an existing cluster so that it tracks the load on the cluster. Task nodes
+        are added when the new step needs more workers than the cluster has and removed again once no other steps
+        are queued or running. The Core group is never shrunk as it holds HDFS data
+        :param conn: An instance of EMR connection object from Connection class
+        :param cluster_id: The cluster Id of the EMR cluster
+        :param instance_count: The number of worker nodes the new step needs
+        :param instance_type: The EC2 instance type to be used if a Task group has to be added
+        :param max_task_instance_count: Optional upper limit on the number of Task nodes. While steps are queued or
+                                        running it does not shrink the Task nodes below their current count
+        :return: The target number of Task nodes
+        '''
+        instance_groups = conn.list_instance_groups(ClusterId=cluster_id)['InstanceGroups']
+        core_groups = [g for g in instance_groups if g['InstanceGroupType'] == 'CORE']
+        task_groups = [g for g in instance_groups if g['InstanceGroupType'] == 'TASK']
+
+        core_instance_count = sum(g['RequestedInstanceCount'] for g in core_groups)
+        task_instance_count = sum(g['RequestedInstanceCount'] for g in task_groups)
+
+        active_step_count = self.get_active_step_count(conn, cluster_id)
+        target_instance_count = self.get_target_instance_count(instance_count,
+                                                               core_instance_count + task_instance_count,
+                                                               active_step_count)
+
+        target_task_count = max(0, target_instance_count - core_instance_count)
+        if max_task_instance_count is not None:
+            # The cap never shrinks the Task nodes below what running steps are using
+            if active_step_count:
+                max_task_instance_count = max(max_task_instance_count, task_instance_count)
+            target_task_count = min(target_task_count, max_task_instance_count)
+
+        logger.info("Resizing Task nodes on {} from {} to {}".format(cluster_id, task_instance_count,
+                                                                     target_task_count))
+
+        if not task_groups:
+            if target_task_count > 0:
+                self.add_task_instance_group(conn, cluster_id, instance_type, target_task_count,
+                                             max_task_instance_count)
+        elif target_task_count != task_instance_count:
+            # Only the first Task group is resized, any others are emptied
+            self.set_instance_count(conn, cluster_id, task_groups[0]['Id'], target_task_count)
+            for group in task_groups[1:]:
+                if group['RequestedInstanceCount']:
+                    self.set_instance_count(conn, cluster_id, group['Id'], 0)
+
+        return target_task_count
+
+
     def terminate_clusters(self, conn, cluster_ids):
         '''
         Shuts a list of clusters (job flows) down. When a job flow is shut down, any step not yet completed
@@ -146,7 +332,8 @@ class EMRInstance:
 
     def launch_emr_and_submit_job(self, conn, log_uri, code_path, step_name, deploy_mode='cluster',
                                   action_on_failure='CONTINUE', cluster_name = 'via_boto', terminate_cluster = False,
-                                  instance_type = 'm3.xlarge', instance_count=1):
+                                  instance_type = 'm3.xlarge', instance_count=1, auto_scaling_role=None,
+                                  subnet_id='subnet-cb098f93', ec2_key_name='dadl'):
         '''
         Launches a new cluster and submits a job to that cluster by adding a step
         :param conn: An instance of EMR connection object from Connection class
@@ -165,7 +352,11 @@ class EMRInstance:
         :param terminate_cluster: Specifies if the cluster is to be terminated after step is completed - boolean
         :param instance_type: The EC2 instance type to be used for Master and Slave (worker) nodes
         :param instance_count: The number of Slave EC2 instances (worker nodes) in the cluster
-        :return: N/A
+        :param auto_scaling_role: Optional IAM role used by EMR to scale Task groups that have an automatic
+                                  scaling policy e.g. EMR_AutoScaling_DefaultRole
+        :param subnet_id: The EC2 subnet (and so the region and availability zone) to launch the cluster in
+        :param ec2_key_name: The name of the EC2 key pair for the nodes. Key pairs only exist in their own region
+        :return: The cluster Id of the new EMR cluster
         '''
         keep_job_flow_alive_when_no_steps = not terminate_cluster
 
@@ -180,6 +371,10 @@ class EMRInstance:
                 }
                 }
 
+        job_flow_args = {}
+        if auto_scaling_role:
+            job_flow_args['AutoScalingRole'] = auto_scaling_role
+
         cluster_id = conn.run_job_flow(
             Name='process_{}'.format(cluster_name),
             LogUri= log_uri,
@@ -201,10 +396,10 @@ class EMRInstance:
                         'InstanceCount': instance_count,
                     }
                 ],
-                'Ec2KeyName': 'dadl',
+                'Ec2KeyName': ec2_key_name,
                 'KeepJobFlowAliveWhenNoSteps': keep_job_flow_alive_when_no_steps,
                 'TerminationProtected': False,
-                'Ec2SubnetId': 'subnet-cb098f93',
+                'Ec2SubnetId': subnet_id,
             },
             Applications=[{'Name': "spark"}],
             Steps=[step],
@@ -217,4 +412,30 @@ class EMRInstance:
                     'Value': cluster_name,
                 },
             ],
-        )
+            **job_flow_args
+        )['JobFlowId']
+
+        return cluster_id
+
+
+    def wait_for_cluster_start(self, conn, cluster_id, poll_interval=30, timeout=600):
+        '''
+        Waits until a new cluster has got its EC2 instances or has terminated. EMR launches clusters asynchronously,
+        so a lack of capacity only shows up in the state change reason of a terminating or terminated cluster
+        :param conn: An instance of EMR connection object from Connection class
+        :param cluster_id: The cluster Id of the EMR cluster
+        :param poll_interval: The number of seconds between status checks
+        :param timeout: The number of seconds to wait before giving up and returning the current status
+        :return: The Status dictionary of the cluster, with State and StateChangeReason
+        '''
+        waited = 0
+        while True:
+            status = conn.describe_cluster(ClusterId=cluster_id)['Cluster']['Status']
+            # Keep polling through TERMINATING so the final state and its reason are seen
+            if status['State'] not in ['STARTING', 'TERMINATING'] or waited >= timeout:
+                logger.info("Cluster {} is {}".format(cluster_id, status['State']))
+                return status
+
+            sleep_time = min(poll_interval, timeout - waited)
+            time.sleep(sleep_time)
+            waited += sleep_time
@@ -0,0 +1,153 @@
+from collections import Counter
+import time
+import logging
+
+# Set log level
+logging.basicConfig()
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Parts of the state change reason of a terminated cluster that mean the region or availability zone could not
+# provide the instances
+CAPACITY_ERROR_MESSAGES = [
+    'insufficient capacity',
+    'insufficientinstancecapacity',
+    'is not supported in the requested availability zone',
+]
+
+# Seconds of Lambda run time kept back for submitting the job after the last wait
+LAUNCH_TIME_MARGIN = 60
+
+class PlacementPolicy:
+
+    def __init__(self, region_subnets=None, region_key_names=None, launch_timeout=600):
+        '''
+        Placement Policy constructor
+        :param region_subnets: An ordered dictionary of the regions clusters can be launched in and the subnets to
+                               try in each region e.g. {"eu-west-1": ["subnet-a", "subnet-b"]}. Regions are tried
+                               in this order after the region the source data lives in
+        :param region_key_names: Optional dictionary of the EC2 key pair to use in each region
+                                 e.g. {"eu-west-1": "dadl"}
+        :param launch_timeout: The number of seconds to wait for a cluster to get its instances before it is
+                               treated as launched
+        '''
+        self.region_subnets = region_subnets or {}
+        self.region_key_names = region_key_names or {}
+        self.launch_timeout = launch_timeout
+        self.source_region = None
+
+
+    def get_source_region(self, conn_s3, s3_manager, source):
+        '''
+        Gets the region that most of the S3 input paths in the manifest source section live in
+        :param conn_s3: An instance of S3 connection object from Connection class
+        :param s3_manager: An instance of S3Manger class
+        :param source: The manifest source dictionary e.g. {"__input_path__": "s3://bucket/key"}
+        :return: The region of the source data, or None if the source section has no S3 paths
+        '''
+        buckets = [path.replace('s3://', '', 1).split('/')[0] for path in list(source.values())
+                   if path.startswith('s3://')]
+        if not buckets:
+            return None
+
+        regions = Counter(s3_manager.get_bucket_region(conn_s3, bucket) for bucket in set(buckets))
+        source_region = regions.most_common(1)[0][0]
+        logger.info("Source data is in {}".format(source_region))
+        return source_region
+
+
+    def get_regions(self, conn_s3, s3_manager, source):
+        '''
+        Gets the regions to place a cluster in, in order of preference. The region the source data lives in comes
+        first, followed by the other configured regions. Also sets source_region
+        :param conn_s3: An instance of S3 connection object from Connection class
+        :param s3_manager: An instance of S3Manger class
+        :param source: The manifest source dictionary
+        :return: A list of regions. A list holding only None means no regions are configured and the default
+                 region should be used
+        '''
+        if not self.region_subnets:
+            return [None]
+
+        regions = list(self.region_subnets.keys())
+        self.source_region = self.get_source_region(conn_s3, s3_manager, source)
+        if self.source_region in regions:
+            regions.remove(self.source_region)
+            regions.insert(0, self.source_region)
+
+        return regions
+
+
+    def is_capacity_error(self, status):
+        '''
+        Checks if a cluster is terminating or terminated because its region or availability zone could not provide
+        the instances
+        :param status: The Status dictionary of the cluster from describe_cluster
+        :return: True if launching somewhere else may succeed
+        '''
+        if status['State'] not in ['TERMINATING', 'TERMINATED_WITH_ERRORS']:
+            return False
+
+        message = status.get('StateChangeReason', {}).get('Message', '').lower()
+        return any(error_message in message for error_message in CAPACITY_ERROR_MESSAGES)
+
+
+    def get_placements(self, regions):
+        '''
+        Gets the region and subnet pairs to launch a cluster in, in order of preference. Regions without configured
+        subnets are skipped, as the default subnet only exists in one region
+        :param regions: The regions to try in order of preference, as returned by get_regions
+        :return: A list of (region, subnet Id) tuples. A single (None, None) means the defaults should be used
+        '''
+        if not self.region_subnets:
+            return [(None, None)]
+
+        return [(region, subnet_id) for region in regions for subnet_id in self.region_subnets.get(region, [])]
+
+
+    def launch_emr_and_submit_job(self, conn, emr, regions, remaining_time, *args, **kwargs):
+        '''
+        Launches a new cluster and submits a job to it in the first region and subnet that has capacity. Each
+        cluster is watched until it has its instances; if it terminates for lack of capacity the next subnet and
+        then the next region is tried. The waits are limited to the time the caller has left
+        :param conn: An instance of Connection class
+        :param emr: An instance of EMRInstance class
+        :param regions: The regions to try in order of preference, as returned by get_regions
+        :param remaining_time: The number of seconds the caller has left e.g. the Lambda remaining time, or None for
+                               no limit
+        :param args: Positional arguments passed to EMRInstance.launch_emr_and_submit_job after the connection
+        :param kwargs: Keyword arguments passed to EMRInstance.launch_emr_and_submit_job
+        :return: A tuple of the region and the cluster Id of the launched cluster
+        '''
+        deadline = None
+        if remaining_time is not None:
+            deadline = time.time() + remaining_time - LAUNCH_TIME_MARGIN
+
+        placements = self.get_placements(regions)
+        if not placements:
+            raise ValueError("No subnets configured for regions {}".format(regions))
+
+        for i, (region, subnet_id) in enumerate(placements):
+            # Subnets and key pairs only exist in their own region, so each placement starts from the defaults
+            launch_kwargs = dict(kwargs)
+            if subnet_id:
+                launch_kwargs['subnet_id'] = subnet_id
+            if region in self.region_key_names:
+                launch_kwargs['ec2_key_name'] = self.region_key_names[region]
+
+            conn_emr = conn.emr_connection(region)
+            cluster_id = emr.launch_emr_and_submit_job(conn_emr, *args, **launch_kwargs)
+
+            # Without another placement to try, or time to wait, there is no need to wait for the cluster to start
+            timeout = self.launch_timeout
+            if deadline is not None:
+                timeout = min(timeout, int(deadline - time.time()))
+            if i == len(placements) - 1 or timeout <= 0:
+                return region, cluster_id
+
+            status = emr.wait_for_cluster_start(conn_emr, cluster_id, timeout=timeout)
+            if not self.is_capacity_error(status):
+                return region, cluster_id
+
+            logger.warning("Cluster {} in {} ({}) had no capacity, trying next placement: {}".format(
+                cluster_id, region, subnet_id, status['StateChangeReason'].get('Message')))
@@ -0,0 +1,184 @@
+from botocore.exceptions import ClientError
+import re
+import math
+import logging
+
+# Set log level
+logging.basicConfig()
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Number of vCPUs for the instance types the planner can choose from, smallest first
+INSTANCE_TYPE_CORES = [
+    ('m4.large', 2),
+    ('m4.xlarge', 4),
+    ('m4.2xlarge', 8),
+    ('m4.4xlarge', 16),
+    ('m4.10xlarge', 40),
+]
+
+# Number of earlier runs used to work out the throughput of a script
+HISTORY_RUN_COUNT = 5
+
+class ResourcePlanner:
+
+    def __init__(self, bytes_per_core=1024 ** 3, max_instance_count=20, target_duration=3600):
+        '''
+        Resource Planner constructor
+        :param bytes_per_core: The number of input bytes a single core is expected to process. Only used when there
+                               are no earlier runs of the script to learn from - default is 1 GiB
+        :param max_instance_count: The largest number of worker nodes the planner will ask for
+        :param target_duration: The number of seconds a run should take
+        '''
+        self.bytes_per_core = bytes_per_core
+        self.max_instance_count = max_instance_count
+        self.target_duration = target_duration
+
+
+    def get_input_size(self, conn_s3, s3_manager, source):
+        '''
+        Sums the size of all S3 input paths listed in the manifest source section
+        :param conn_s3: An instance of S3 connection object from Connection class
+        :param s3_manager: An instance of S3Manger class
+        :param source: The manifest source dictionary e.g. {"__input_path__": "s3://bucket/key"}
+        :return: The total size of the input data in bytes
+        '''
+        return sum(s3_manager.get_total_object_size(conn_s3, path) for path in list(source.values())
+                   if path.startswith('s3://'))
+
+
+    def get_cluster_cores(self, conn_emr, cluster_id):
+        '''
+        Gets the number of worker cores a cluster has asked for, over its Core and Task instance groups
+        :param conn_emr: An instance of EMR connection object from Connection class
+        :param cluster_id: The cluster Id of the EMR cluster
+        :return: The number of worker cores
+        '''
+        instance_groups = conn_emr.list_instance_groups(ClusterId=cluster_id)['InstanceGroups']
+        return sum(g['RequestedInstanceCount'] * self.get_instance_type_cores(g['InstanceType'])
+                   for g in instance_groups if g['InstanceGroupType'] in ['CORE', 'TASK'])
+
+
+    def get_run_metadata(self, input_size, cores):
+        '''
+        Builds the S3 metadata stored with a generated ETL so later runs can work out the throughput of the script
+        :param input_size: The total size of the input data in bytes
+        :param cores: The number of worker cores the run gets, which on a reused cluster can be more than planned
+        :return: A dictionary of S3 metadata
+        '''
+        return {
+            'input-bytes': str(input_size),
+            'cores': str(cores)
+        }
+
+
+    def get_historical_runs(self, conn_emr, cluster_id, conn_s3, s3_manager, script_s3_bucket, script,
+                            exec_environment):
+        '''
+        Gets the input size, cores and run time of the latest completed steps on a cluster that were generated from
+        the same ETL script. Input size and cores are read from the metadata of the generated ETL in S3, so only
+        runs planned with auto_resource are returned
+        :param conn_emr: An instance of EMR connection object from Connection class
+        :param cluster_id: The cluster Id of the EMR cluster
+        :param conn_s3: An instance of S3 connection object from Connection class
+        :param s3_manager: An instance of S3Manger class
+        :param script_s3_bucket: The bucket the generated ETLs are uploaded to
+        :param script: The name of the ETL script e.g. dcm_api_report_0.0.1.py
+        :param exec_environment: Execution environment e.g. nonprod
+        :return: A list of (input size in bytes, cores, duration in seconds) tuples
+        '''
+        # Steps are named <script>_<exec_environment>_<epoch>.py-<submit time> by submit_job
+        script_base = script[:-len('.py')] if script.endswith('.py') else script
+        step_pattern = re.compile(r'^({}_{}_\d+\.py)-'.format(re.escape(script_base), re.escape(exec_environment)))
+
+        runs = []
+        paginator = conn_emr.get_paginator('list_steps')
+        for page in paginator.paginate(ClusterId=cluster_id, StepStates=['COMPLETED']):
+            for step in page['Steps']:
+                match = step_pattern.match(step['Name'])
+                timeline = step['Status']['Timeline']
+                if not match or 'StartDateTime' not in timeline or 'EndDateTime' not in timeline:
+                    continue
+
+                try:
+                    metadata = s3_manager.get_object_metadata(conn_s3, script_s3_bucket,
+                                                              'generated-etls/{}'.format(match.group(1)))
+                except ClientError:
+                    continue
+                if 'input-bytes' not in metadata or 'cores' not in metadata:
+                    continue
+
+                duration = (timeline['EndDateTime'] - timeline['StartDateTime']).total_seconds()
+                runs.append((int(metadata['input-bytes']), int(metadata['cores']), duration))
+                if len(runs) == HISTORY_RUN_COUNT:
+                    return runs
+
+        return runs
+
+
+    def get_required_cores(self, input_size, runs=None):
+        '''
+        Works out how many cores are needed to process the input data within the target duration. If earlier runs
+        are given their throughput (bytes per core-second) is used, otherwise the bytes per core model
+        :param input_size: The total size of the input data in bytes
+        :param runs: Optional list of (input size in bytes, cores, duration in seconds) tuples of earlier runs
+        :return: The number of cores needed
+        '''
+        runs = [(size, cores, duration) for size, cores, duration in (runs or []) if size and cores and duration]
+
+        if runs:
+            throughput = sum(float(size) / (cores * duration) for size, cores, duration in runs) / len(runs)
+            cores = int(math.ceil(input_size / (throughput * self.target_duration)))
+        else:
+            cores = int(math.ceil(float(input_size) / self.bytes_per_core))
+
+        return max(cores, 1)
+
+
+    def get_instance_type_cores(self, instance_type):
+        '''
+        Gets the number of vCPUs of an EC2 instance type from its size e.g. 2 for m4.large and 16 for r4.4xlarge
+        :param instance_type: The EC2 instance type
+        :return: The number of vCPUs
+        '''
+        cores = dict(INSTANCE_TYPE_CORES).get(instance_type)
+        if cores:
+            return cores
+
+        size = instance_type.split('.')[-1]
+        if size == 'medium':
+            return 1
+        if size == 'large':
+            return 2
+        if size == 'xlarge':
+            return 4
+        if size.endswith('xlarge') and size[:-len('xlarge')].isdigit():
+            return 4 * int(size[:-len('xlarge')])
+
+        raise ValueError("Unknown number of cores for instance type {}".format(instance_type))
+
+
+    def get_instance_count(self, required_cores, instance_type):
+        '''
+        Works out how many nodes of a given instance type provide the required cores, e.g. for an existing cluster
+        :param required_cores: The number of cores needed
+        :param instance_type: The EC2 instance type of the nodes
+        :return: The number of worker nodes, at most max_instance_count
+        '''
+        instance_count = int(math.ceil(float(required_cores) / self.get_instance_type_cores(instance_type)))
+        return max(1, min(instance_count, self.max_instance_count))
+
+
+    def get_instance_plan(self, required_cores):
+        '''
+        Picks the smallest instance type that can provide the required cores within the maximum number of nodes
+        :param required_cores: The number of cores needed
+        :return: A tuple of instance type and the number of worker nodes
+        '''
+        for instance_type, cores in INSTANCE_TYPE_CORES:
+            instance_count = int(math.ceil(float(required_cores) / cores))
+            if instance_count <= self.max_instance_count:
+                return instance_type, instance_count
+
+        # Not even the largest instance type fits, use as many of them as allowed
+        return INSTANCE_TYPE_CORES[-1][0], self.max_instance_count
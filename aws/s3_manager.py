@@ -32,7 +32,8 @@ class S3Manager:
         return dest_file_name
 
 
-    def upload_object(self, conn, src_file_path, src_file_name, dest_bucket_name, dest_file_path, dest_file_name):
+    def upload_object(self, conn, src_file_path, src_file_name, dest_bucket_name, dest_file_path, dest_file_name,
+                      metadata=None):
         '''
         Uploads a local file to S3
         :param conn: An instance of S3 connection object from Connection class
@@ -41,11 +42,12 @@ class S3Manager:
         :param dest_bucket_name: The name of the S3 bucket where the file is to be uploaded
         :param dest_file_path: The prefix value where the file is to be uploaded within the bucket
         :param dest_file_name: The name of the file to be uploaded
+        :param metadata: Optional dictionary of user metadata to store with the object
         :return: N/A
         '''
         logger.info("Uploading {}/{}".format(src_file_path, src_file_name))
         conn.Object(dest_bucket_name, '{}/{}'.format(dest_file_path, dest_file_name)).put(
-            Body=open('{}/{}'.format(src_file_path, src_file_name), 'rb'))
+            Body=open('{}/{}'.format(src_file_path, src_file_name), 'rb'), Metadata=metadata or {})
 
 
     def delete_object(self, conn, bucket_name, file_path, file_name):
@@ -60,3 +62,47 @@ class S3Manager:
         logger.info("Deleting {}/{}".format(file_path, file_name))
         conn.Object(bucket_name, '{}/{}'.format(file_path, file_name)).delete()
 
+
+    def get_object_metadata(self, conn, bucket_name, key):
+        '''
+        Gets the user metadata stored with an S3 object
+        :param conn: An instance of S3 connection object from Connection class
+        :param bucket_name: The name of the S3 bucket that contains the file
+        :param key: The key of the file including any prefixes
+        :return: A dictionary of user metadata
+        '''
+        return conn.Object(bucket_name, key).metadata
+
+
+    def get_total_object_size(self, conn, s3_uri):
+        '''
+        Sums the size of all objects under an S3 URI. The listing is paginated so prefixes with more than 1000
+        objects are counted in full
+        :param conn: An instance of S3 connection object from Connection class
+        :param s3_uri: The S3 URI of an object or prefix e.g. s3://bucket/path/
+        :return: The total size of the objects in bytes
+        '''
+        bucket_name, _, prefix = s3_uri.replace('s3://', '', 1).partition('/')
+        total_size = 0
+        for obj in conn.Bucket(bucket_name).objects.filter(Prefix=prefix).page_size(1000):
+            total_size += obj.size
+
+        logger.info("Total size of {}: {} bytes".format(s3_uri, total_size))
+        return total_size
+
+
+    def get_bucket_region(self, conn, bucket_name):
+        '''
+        Gets the AWS region an S3 bucket lives in
+        :param conn: An instance of S3 connection object from Connection class
+        :param bucket_name: The name of the S3 bucket
+        :return: The region of the bucket e.g. eu-west-1
+        '''
+        location = conn.meta.client.get_bucket_location(Bucket=bucket_name)['LocationConstraint']
+
+        # Buckets in us-east-1 have no location constraint and old eu-west-1 buckets report 'EU'
+        if not location:
+            return 'us-east-1'
+        if location == 'EU':
+            return 'eu-west-1'
+        return location
@@ -2,8 +2,12 @@
 from aws import Connection
 from aws import EMRInstance
 from aws import S3Manager
+from aws import ResourcePlanner
+from aws import PlacementPolicy
 from manifest import ManifestParser
+from collections import OrderedDict
 import os
+import json
 import urllib
 import boto3
 import time
@@ -50,6 +54,10 @@ def lambda_handler(event, context):
     manifest_file_path = os.environ['manifest_file_path']
     manifest_file = os.environ['manifest_file']
     log_uri = os.environ['log_uri']
+    # Optional regions and subnets clusters can be placed in e.g. {"eu-west-1": ["subnet-a", "subnet-b"]}
+    region_subnets = json.loads(os.environ.get('region_subnets', '{}'), object_pairs_hook=OrderedDict)
+    # Optional EC2 key pair for each region e.g. {"eu-west-1": "dadl"}, key pairs only exist in their own region
+    region_key_names = json.loads(os.environ.get('region_key_names', '{}'))
 
     # Download manifest file
     get_manifest_file(event, manifest_file_path, manifest_file)
@@ -57,8 +65,6 @@ def lambda_handler(event, context):
 
     # Instantiate Connection
     conn = Connection()
-    # Create an EMR connection
-    conn_emr = conn.emr_connection()
     # Create an S3 connection
     conn_s3 = conn.s3_connection()
     # Instantiate S3Manager
@@ -81,46 +87,103 @@ def lambda_handler(event, context):
         logging.error(sys.exc_info())
         raise
 
-    # Copy generated ETL to S3. This will then be submitted to EMR
-    try:
-        s3_manager.upload_object(conn_s3, etl_file_path, dest_etl_file, manifest_parser.script_s3_bucket,
-                                 'generated-etls',
-                                 dest_etl_file)
-    except:
-        raise
-
+    # Instantiate EMR Instance
+    emr = EMRInstance()
 
-    # Launch and submit jobs to EMR
+    # Find a cluster to reuse and, in auto mode, plan the instance type and count from the size of the input data
     try:
-        # Instantiate EMR Instance
-        emr = EMRInstance()
+        # Place the cluster in the region the source data lives in, other configured regions are fallbacks
+        placement_policy = PlacementPolicy(region_subnets, region_key_names)
+        regions = placement_policy.get_regions(conn_s3, s3_manager, manifest_parser.source)
+        # Create an EMR connection
+        conn_emr = conn.emr_connection(regions[0])
+        # Create an S3 connection in the region of the source data to list it
+        conn_s3_source = conn.s3_connection(placement_policy.source_region)
 
         cluster_name = "{}_{}".format(exec_environment, manifest_parser.script_s3_key)
         cluster_id = emr.get_first_available_cluster(conn_emr)
 
-        if manifest_parser.use_existing_cluster and cluster_id:
-            instance_groups = emr.get_instance_groups(conn_emr, cluster_id)
-            group_id = instance_groups['CORE']
+        run_metadata = {}
+        if manifest_parser.auto_resource:
+            resource_planner = ResourcePlanner(manifest_parser.bytes_per_core, manifest_parser.max_instance_count,
+                                               manifest_parser.target_duration)
+            input_size = resource_planner.get_input_size(conn_s3_source, s3_manager, manifest_parser.source)
+
+            runs = []
+            if cluster_id:
+                runs = resource_planner.get_historical_runs(conn_emr, cluster_id, conn_s3, s3_manager,
+                                                            manifest_parser.script_s3_bucket,
+                                                            manifest_parser.script_s3_key, exec_environment)
+            required_cores = resource_planner.get_required_cores(input_size, runs)
+
+            if manifest_parser.use_existing_cluster and cluster_id:
+                # Size for the nodes the reused cluster already has
+                manifest_parser.instance_type = emr.get_instance_type(conn_emr, cluster_id, 'CORE')
+                manifest_parser.instance_count = resource_planner.get_instance_count(required_cores,
+                                                                                     manifest_parser.instance_type)
+            else:
+                manifest_parser.instance_type, manifest_parser.instance_count = resource_planner.get_instance_plan(
+                    required_cores)
+            logger.info("Planned {} x {} for {} bytes of input".format(manifest_parser.instance_count,
+                                                                       manifest_parser.instance_type, input_size))
+    except:
+        logger.error("Failed while trying to plan EMR resources. Details below:")
+        raise
 
-            instance_groups_count = emr.get_instance_groups_count(conn_emr, cluster_id)
-            current_instance_count = instance_groups_count[group_id]
 
-            if manifest_parser.instance_count > current_instance_count:
-                emr.set_instance_count(conn_emr, cluster_id, group_id, manifest_parser.instance_count)
+    # Resize or launch EMR and submit jobs to it
+    try:
+        reuse_cluster = manifest_parser.use_existing_cluster and cluster_id
+
+        if reuse_cluster:
+            if manifest_parser.elastic_scaling:
+                # Grow or shrink the Task nodes to match the load on the cluster
+                emr.resize_for_demand(conn_emr, cluster_id, manifest_parser.instance_count,
+                                      manifest_parser.instance_type, manifest_parser.max_task_instance_count)
                 # Allow 10 secs for resizing to start
                 time.sleep(10)
+            else:
+                instance_groups = emr.get_instance_groups(conn_emr, cluster_id)
+                group_id = instance_groups['CORE']
+
+                instance_groups_count = emr.get_instance_groups_count(conn_emr, cluster_id)
+                current_instance_count = instance_groups_count[group_id]
+
+                if manifest_parser.instance_count > current_instance_count:
+                    emr.set_instance_count(conn_emr, cluster_id, group_id, manifest_parser.instance_count)
+                    # Allow 10 secs for resizing to start
+                    time.sleep(10)
+
+        # Stored with the generated ETL so later runs can work out the throughput of the script. A reused cluster
+        # can have more cores than planned, so its actual size after resizing is recorded
+        run_metadata = {}
+        if manifest_parser.auto_resource:
+            if reuse_cluster:
+                run_cores = resource_planner.get_cluster_cores(conn_emr, cluster_id)
+            else:
+                run_cores = manifest_parser.instance_count * resource_planner.get_instance_type_cores(
+                    manifest_parser.instance_type)
+            run_metadata = resource_planner.get_run_metadata(input_size, run_cores)
+
+        # Copy generated ETL to S3. This will then be submitted to EMR
+        s3_manager.upload_object(conn_s3, etl_file_path, dest_etl_file, manifest_parser.script_s3_bucket,
+                                 'generated-etls',
+                                 dest_etl_file, run_metadata)
 
+        if reuse_cluster:
             #submit job
             emr.submit_job(conn_emr, cluster_id, 's3://{}/generated-etls/{}'.format(manifest_parser.script_s3_bucket,
                                                                          dest_etl_file), dest_etl_file, 'cluster', 'CONTINUE')
         else:
             # Launch EMR cluster
-            emr.launch_emr_and_submit_job(conn_emr, log_uri,
-                                          's3://{}/generated-etls/{}'.format(manifest_parser.script_s3_bucket,
-                                                                             dest_etl_file),
-                                          dest_etl_file, 'cluster', 'CONTINUE', '{}'.format(cluster_name),
-                                          manifest_parser.terminate_cluster, manifest_parser.instance_type,
-                                          manifest_parser.instance_count)
+            placement_policy.launch_emr_and_submit_job(conn, emr, regions,
+                                                       context.get_remaining_time_in_millis() / 1000.0, log_uri,
+                                                       's3://{}/generated-etls/{}'.format(manifest_parser.script_s3_bucket,
+                                                                                          dest_etl_file),
+                                                       dest_etl_file, 'cluster', 'CONTINUE', '{}'.format(cluster_name),
+                                                       manifest_parser.terminate_cluster, manifest_parser.instance_type,
+                                                       manifest_parser.instance_count,
+                                                       'EMR_AutoScaling_DefaultRole' if manifest_parser.elastic_scaling else None)
 
         logger.info("Submitted s3://{}/{} to process_{}".format(manifest_parser.script, dest_etl_file, cluster_name))
     except:
@@ -16,6 +16,13 @@ class ManifestParser:
         self.instance_type = 'm3.xlarge'
         self.use_existing_cluster = False
         self.terminate_cluster = True
+        self.elastic_scaling = False
+        self.max_task_instance_count = None
+        self.auto_resource = False
+        self.bytes_per_core = 1024 ** 3
+        self.max_instance_count = 20
+        self.target_duration = 3600
+        self.source = {}
 
 
     def json_to_dict(self, src_file_path, ordered_dict=False):
@@ -78,10 +85,20 @@ class ManifestParser:
         :param dict: The manifest dictionary
         :return: N/A
         '''
-        self.instance_type = dict['resource']['instance_type']
-        self.instance_count = int(dict['resource']['instance_count'])
+        self.auto_resource = self.parse_bool_string(dict['resource'].get('auto_resource', 'False'))
+        # instance_type and instance_count can only be left out when they are planned from the input size
+        if not self.auto_resource or 'instance_type' in dict['resource']:
+            self.instance_type = dict['resource']['instance_type']
+        if not self.auto_resource or 'instance_count' in dict['resource']:
+            self.instance_count = int(dict['resource']['instance_count'])
         self.use_existing_cluster = self.parse_bool_string(dict['resource']['use_existing_cluster'])
         self.terminate_cluster =  self.parse_bool_string(dict['resource']['terminate_cluster'])
+        self.elastic_scaling = self.parse_bool_string(dict['resource'].get('elastic_scaling', 'False'))
+        if 'max_task_instance_count' in dict['resource']:
+            self.max_task_instance_count = int(dict['resource']['max_task_instance_count'])
+        self.bytes_per_core = int(dict['resource'].get('bytes_per_core', self.bytes_per_core))
+        self.max_instance_count = int(dict['resource'].get('max_instance_count', self.max_instance_count))
+        self.target_duration = int(dict['resource'].get('target_duration', self.target_duration))
 
 
     def get_replacements(self, dict):
@@ -140,6 +157,7 @@ class ManifestParser:
         # Get instance type and number of instances from the manifest file
         self.get_etl_details(manifest_dict)
         self.get_resource_details(manifest_dict)
+        self.source = manifest_dict['source']
         replacements = self.get_replacements(manifest_dict)
 
         # Download the ETL file from S3 & generate a new temp ETL File
@@ -28,6 +28,21 @@ class TestConnection(unittest.TestCase):
         s3_conn = self.conn.s3_connection()
         self.assertEqual(s3_conn, s3, 'The object is not a s3 resource')
 
+    def test_emr_connection_per_region(self):
+        """Test routine emr_connection_per_region"""
+        emr_eu = self.conn.emr_connection('eu-west-1')
+        emr_us = self.conn.emr_connection('us-east-1')
+        self.assertEqual(emr_eu.meta.region_name, 'eu-west-1')
+        self.assertEqual(emr_us.meta.region_name, 'us-east-1')
+        self.assertIs(self.conn.emr_connection('eu-west-1'), emr_eu, 'The region handle is not reused')
+
+
+    def test_default_region_used_for_connections(self):
+        """Test routine default_region_used_for_connections"""
+        conn = aws.Connection('eu-west-1')
+        self.assertEqual(conn.emr_connection().meta.region_name, 'eu-west-1')
+        self.assertEqual(conn.s3_connection().meta.client.meta.region_name, 'eu-west-1')
+
     '''
     @mock_emr
     def test_there_is_an_emr_connection_object(self):
@@ -0,0 +1,146 @@
+import unittest
+import aws
+import boto3
+from moto import mock_emr
+from moto import mock_ec2
+
+
+class FakeEMRConnection:
+
+    def __init__(self, states):
+        self.states = states
+
+    def describe_cluster(self, ClusterId):
+        state = self.states.pop(0)
+        reason = {'Message': 'Insufficient capacity'} if state.startswith('TERMINAT') else {}
+        return {'Cluster': {'Status': {'State': state, 'StateChangeReason': reason}}}
+
+
+class TestEMRInstance(unittest.TestCase):
+
+
+    def setUp(self):
+        """Setup"""
+        self.emr = aws.EMRInstance()
+
+
+    def test_target_instance_count_grows_for_new_step(self):
+        """Test routine target_instance_count_grows_for_new_step"""
+        self.assertEqual(self.emr.get_target_instance_count(6, 4, 2), 6)
+
+
+    def test_target_instance_count_never_shrinks_below_running_demand(self):
+        """Test routine target_instance_count_never_shrinks_below_running_demand"""
+        self.assertEqual(self.emr.get_target_instance_count(2, 8, 1), 8)
+
+
+    def test_target_instance_count_shrinks_when_idle(self):
+        """Test routine target_instance_count_shrinks_when_idle"""
+        self.assertEqual(self.emr.get_target_instance_count(2, 8, 0), 2)
+
+
+    def test_task_auto_scaling_policy_constraints(self):
+        """Test routine task_auto_scaling_policy_constraints"""
+        policy = self.emr.get_task_auto_scaling_policy(10)
+        self.assertEqual(policy['Constraints'], {'MinCapacity': 0, 'MaxCapacity': 10})
+
+
+    def create_cluster(self, conn, task_instance_count=0, steps=None, auto_scaling_role=None):
+        """Launches a cluster with 2 Core nodes and an optional Task group in the mocked EMR"""
+        instance_groups = [
+            {'Name': 'Master nodes', 'Market': 'ON_DEMAND', 'InstanceRole': 'MASTER',
+             'InstanceType': 'm3.xlarge', 'InstanceCount': 1},
+            {'Name': 'Slave nodes', 'Market': 'ON_DEMAND', 'InstanceRole': 'CORE',
+             'InstanceType': 'm3.xlarge', 'InstanceCount': 2},
+        ]
+        if task_instance_count:
+            instance_groups.append({'Name': 'Task nodes', 'Market': 'ON_DEMAND', 'InstanceRole': 'TASK',
+                                    'InstanceType': 'm3.xlarge', 'InstanceCount': task_instance_count})
+
+        job_flow_args = {}
+        if auto_scaling_role:
+            job_flow_args['AutoScalingRole'] = auto_scaling_role
+
+        return conn.run_job_flow(
+            Name='test',
+            Instances={
+                'InstanceGroups': instance_groups,
+                'KeepJobFlowAliveWhenNoSteps': True,
+            },
+            Steps=steps or [],
+            JobFlowRole='EMR_EC2_DefaultRole',
+            ServiceRole='EMR_DefaultRole',
+            **job_flow_args
+        )['JobFlowId']
+
+
+    def get_task_groups(self, conn, cluster_id):
+        """Gets the Task instance groups of a cluster"""
+        return [g for g in conn.list_instance_groups(ClusterId=cluster_id)['InstanceGroups']
+                if g['InstanceGroupType'] == 'TASK']
+
+
+    @mock_emr
+    def test_resize_for_demand_adds_task_group(self):
+        """Test routine resize_for_demand_adds_task_group"""
+        conn = boto3.client('emr', region_name='us-east-1')
+        cluster_id = self.create_cluster(conn)
+
+        target_task_count = self.emr.resize_for_demand(conn, cluster_id, 5, 'm3.xlarge')
+        self.assertEqual(target_task_count, 3)
+
+        instance_groups = self.emr.get_instance_groups(conn, cluster_id)
+        self.assertIn('TASK', instance_groups)
+
+
+    @mock_emr
+    def test_resize_for_demand_cap_keeps_running_demand(self):
+        """Test routine resize_for_demand_cap_keeps_running_demand"""
+        conn = boto3.client('emr', region_name='us-east-1')
+        step = {'Name': 'running', 'ActionOnFailure': 'CONTINUE',
+                'HadoopJarStep': {'Jar': 'command-runner.jar', 'Args': ['spark-submit', 'job.py']}}
+        cluster_id = self.create_cluster(conn, task_instance_count=8, steps=[step])
+
+        target_task_count = self.emr.resize_for_demand(conn, cluster_id, 2, 'm3.xlarge', max_task_instance_count=5)
+        self.assertEqual(target_task_count, 8)
+        self.assertEqual(self.get_task_groups(conn, cluster_id)[0]['RequestedInstanceCount'], 8)
+
+
+    @mock_emr
+    def test_task_group_gets_auto_scaling_policy_by_default(self):
+        """Test routine task_group_gets_auto_scaling_policy_by_default"""
+        conn = boto3.client('emr', region_name='us-east-1')
+        cluster_id = self.create_cluster(conn, auto_scaling_role='EMR_AutoScaling_DefaultRole')
+
+        self.emr.add_task_instance_group(conn, cluster_id, 'm3.xlarge', 3)
+        policy = self.get_task_groups(conn, cluster_id)[0]['AutoScalingPolicy']
+        self.assertEqual(policy['Constraints']['MaxCapacity'], aws.emr_instance.DEFAULT_MAX_TASK_INSTANCE_COUNT)
+
+
+    @mock_ec2
+    @mock_emr
+    def test_launch_returns_cluster_id_and_waits_for_start(self):
+        """Test routine launch_returns_cluster_id_and_waits_for_start"""
+        ec2 = boto3.client('ec2', region_name='us-east-1')
+        vpc_id = ec2.create_vpc(CidrBlock='10.0.0.0/16')['Vpc']['VpcId']
+        subnet_id = ec2.create_subnet(VpcId=vpc_id, CidrBlock='10.0.0.0/24')['Subnet']['SubnetId']
+
+        conn = boto3.client('emr', region_name='us-east-1')
+        cluster_id = self.emr.launch_emr_and_submit_job(conn, 's3://logs/', 's3://etl/job.py', 'job.py',
+                                                        subnet_id=subnet_id, ec2_key_name='dadl-us')
+        self.assertEqual(conn.describe_cluster(ClusterId=cluster_id)['Cluster']['Ec2InstanceAttributes']['Ec2KeyName'],
+                         'dadl-us')
+
+        status = self.emr.wait_for_cluster_start(conn, cluster_id, poll_interval=0, timeout=0)
+        self.assertIn(status['State'], ['STARTING', 'BOOTSTRAPPING', 'RUNNING', 'WAITING'])
+
+
+    def test_wait_for_cluster_start_polls_through_terminating(self):
+        """Test routine wait_for_cluster_start_polls_through_terminating"""
+        conn = FakeEMRConnection(['STARTING', 'TERMINATING', 'TERMINATED_WITH_ERRORS'])
+        status = self.emr.wait_for_cluster_start(conn, 'j-1', poll_interval=0, timeout=60)
+        self.assertEqual(status['State'], 'TERMINATED_WITH_ERRORS')
+
+
+if __name__ == '__main__':
+    unittest.main()
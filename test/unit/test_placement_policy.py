@@ -0,0 +1,131 @@
+import unittest
+import aws
+from collections import OrderedDict
+
+
+class FakeS3Manager:
+
+    def __init__(self, bucket_regions):
+        self.bucket_regions = bucket_regions
+
+    def get_bucket_region(self, conn, bucket_name):
+        return self.bucket_regions[bucket_name]
+
+
+class FakeEMRInstance:
+
+    def __init__(self, failing_subnets, message='Insufficient capacity for instance type m4.large.',
+                 failed_state='TERMINATED_WITH_ERRORS'):
+        self.failing_subnets = failing_subnets
+        self.message = message
+        self.failed_state = failed_state
+        self.launches = []
+        self.wait_timeouts = []
+
+    def launch_emr_and_submit_job(self, conn, *args, **kwargs):
+        self.launches.append((kwargs.get('subnet_id'), kwargs.get('ec2_key_name')))
+        return kwargs.get('subnet_id')
+
+    def wait_for_cluster_start(self, conn, cluster_id, poll_interval=30, timeout=600):
+        self.wait_timeouts.append(timeout)
+        if cluster_id in self.failing_subnets:
+            return {'State': self.failed_state,
+                    'StateChangeReason': {'Code': 'VALIDATION_ERROR', 'Message': self.message}}
+        return {'State': 'BOOTSTRAPPING', 'StateChangeReason': {}}
+
+
+class TestPlacementPolicy(unittest.TestCase):
+
+
+    def setUp(self):
+        """Setup"""
+        self.policy = aws.PlacementPolicy(OrderedDict([('us-east-1', ['subnet-us']),
+                                                       ('eu-west-1', ['subnet-eu-a', 'subnet-eu-b'])]))
+        self.s3_manager = FakeS3Manager({'eu-data': 'eu-west-1', 'us-data': 'us-east-1'})
+
+
+    def test_source_region_first(self):
+        """Test routine source_region_first"""
+        source = {'__input_path__': 's3://eu-data/csv/report.csv', '__timezone__': 'America/Los_Angeles'}
+        regions = self.policy.get_regions(None, self.s3_manager, source)
+        self.assertEqual(regions, ['eu-west-1', 'us-east-1'])
+
+
+    def test_default_region_when_not_configured(self):
+        """Test routine default_region_when_not_configured"""
+        source = {'__input_path__': 's3://eu-data/csv/report.csv'}
+        self.assertEqual(aws.PlacementPolicy().get_regions(None, self.s3_manager, source), [None])
+
+
+    def test_launch_falls_back_on_capacity_error(self):
+        """Test routine launch_falls_back_on_capacity_error"""
+        emr = FakeEMRInstance(['subnet-eu-a', 'subnet-eu-b'])
+        policy = aws.PlacementPolicy(self.policy.region_subnets, {'us-east-1': 'dadl-us'})
+        region, cluster_id = policy.launch_emr_and_submit_job(aws.Connection(), emr, ['eu-west-1', 'us-east-1'],
+                                                              None)
+        self.assertEqual((region, cluster_id), ('us-east-1', 'subnet-us'))
+        self.assertEqual(emr.launches, [('subnet-eu-a', None), ('subnet-eu-b', None), ('subnet-us', 'dadl-us')])
+
+
+    def test_launch_falls_back_while_cluster_terminating(self):
+        """Test routine launch_falls_back_while_cluster_terminating"""
+        emr = FakeEMRInstance(['subnet-eu-a'], failed_state='TERMINATING')
+        region, cluster_id = self.policy.launch_emr_and_submit_job(aws.Connection(), emr,
+                                                                   ['eu-west-1', 'us-east-1'], None)
+        self.assertEqual((region, cluster_id), ('eu-west-1', 'subnet-eu-b'))
+
+
+    def test_launch_does_not_carry_placement_into_next_region(self):
+        """Test routine launch_does_not_carry_placement_into_next_region"""
+        emr = FakeEMRInstance(['subnet-us'])
+        policy = aws.PlacementPolicy(self.policy.region_subnets, {'us-east-1': 'dadl-us'})
+        policy.launch_emr_and_submit_job(aws.Connection(), emr, ['us-east-1', 'eu-west-1'], None)
+        self.assertEqual(emr.launches, [('subnet-us', 'dadl-us'), ('subnet-eu-a', None)])
+
+
+    def test_launch_skips_regions_without_subnets(self):
+        """Test routine launch_skips_regions_without_subnets"""
+        emr = FakeEMRInstance(['subnet-us'])
+        policy = aws.PlacementPolicy(OrderedDict([('us-east-1', ['subnet-us']), ('eu-west-1', [])]))
+        region, cluster_id = policy.launch_emr_and_submit_job(aws.Connection(), emr, ['eu-west-1', 'us-east-1'],
+                                                              None)
+        self.assertEqual((region, cluster_id), ('us-east-1', 'subnet-us'))
+        self.assertEqual(emr.launches, [('subnet-us', None)])
+
+
+    def test_launch_does_not_retry_other_errors(self):
+        """Test routine launch_does_not_retry_other_errors"""
+        emr = FakeEMRInstance(['subnet-eu-a'], message='The subnet ID is invalid')
+        region, cluster_id = self.policy.launch_emr_and_submit_job(aws.Connection(), emr,
+                                                                   ['eu-west-1', 'us-east-1'], None)
+        self.assertEqual((region, cluster_id), ('eu-west-1', 'subnet-eu-a'))
+        self.assertEqual(len(emr.launches), 1)
+
+
+    def test_launch_returns_last_placement_without_waiting(self):
+        """Test routine launch_returns_last_placement_without_waiting"""
+        emr = FakeEMRInstance(['subnet-eu-a', 'subnet-eu-b', 'subnet-us'])
+        region, cluster_id = self.policy.launch_emr_and_submit_job(aws.Connection(), emr,
+                                                                   ['eu-west-1', 'us-east-1'], None)
+        self.assertEqual((region, cluster_id), ('us-east-1', 'subnet-us'))
+        self.assertEqual(len(emr.wait_timeouts), 2)
+
+
+    def test_launch_waits_within_remaining_time(self):
+        """Test routine launch_waits_within_remaining_time"""
+        emr = FakeEMRInstance(['subnet-eu-a'])
+        self.policy.launch_emr_and_submit_job(aws.Connection(), emr, ['eu-west-1', 'us-east-1'], 360)
+        self.assertTrue(0 < emr.wait_timeouts[0] <= 300)
+
+
+    def test_launch_returns_current_cluster_when_out_of_time(self):
+        """Test routine launch_returns_current_cluster_when_out_of_time"""
+        emr = FakeEMRInstance(['subnet-eu-a'])
+        region, cluster_id = self.policy.launch_emr_and_submit_job(aws.Connection(), emr,
+                                                                   ['eu-west-1', 'us-east-1'], 30)
+        self.assertEqual((region, cluster_id), ('eu-west-1', 'subnet-eu-a'))
+        self.assertEqual(emr.wait_timeouts, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
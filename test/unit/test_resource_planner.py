@@ -0,0 +1,148 @@
+import unittest
+import datetime
+import aws
+import boto3
+from moto import mock_s3
+from moto import mock_emr
+
+
+class FakePaginator:
+
+    def __init__(self, steps):
+        self.steps = steps
+
+    def paginate(self, **kwargs):
+        return [{'Steps': self.steps}]
+
+
+class FakeEMRConnection:
+
+    def __init__(self, steps):
+        self.steps = steps
+
+    def get_paginator(self, operation_name):
+        return FakePaginator(self.steps)
+
+
+class FakeS3Manager:
+
+    def __init__(self, metadata):
+        self.metadata = metadata
+
+    def get_object_metadata(self, conn, bucket_name, key):
+        return self.metadata.get(key, {})
+
+
+class TestResourcePlanner(unittest.TestCase):
+
+
+    def setUp(self):
+        """Setup"""
+        self.planner = aws.ResourcePlanner(bytes_per_core=100, max_instance_count=4, target_duration=600)
+
+
+    def test_required_cores_from_input_size(self):
+        """Test routine required_cores_from_input_size"""
+        self.assertEqual(self.planner.get_required_cores(1050), 11)
+
+
+    def test_required_cores_for_empty_input(self):
+        """Test routine required_cores_for_empty_input"""
+        self.assertEqual(self.planner.get_required_cores(0), 1)
+
+
+    def test_required_cores_from_run_throughput(self):
+        """Test routine required_cores_from_run_throughput"""
+        # 10 cores took 1200s for 1000 bytes, so the target of 600s needs 20 cores
+        self.assertEqual(self.planner.get_required_cores(1000, [(1000, 10, 1200)]), 20)
+
+
+    def test_required_cores_stable_when_target_met(self):
+        """Test routine required_cores_stable_when_target_met"""
+        self.assertEqual(self.planner.get_required_cores(1000, [(1000, 20, 600)]), 20)
+
+
+    def test_instance_count_for_existing_instance_type(self):
+        """Test routine instance_count_for_existing_instance_type"""
+        self.assertEqual(self.planner.get_instance_count(20, 'm4.4xlarge'), 2)
+        self.assertEqual(self.planner.get_instance_count(6, 'r4.large'), 3)
+        self.assertEqual(self.planner.get_instance_count(100, 'm3.xlarge'), 4)
+
+
+    def test_historical_runs_match_exact_script(self):
+        """Test routine historical_runs_match_exact_script"""
+        start = datetime.datetime(2017, 9, 2, 10, 0)
+        timeline = {'StartDateTime': start, 'EndDateTime': start + datetime.timedelta(seconds=900)}
+        steps = [
+            {'Name': 'report_nonprod_1504346400.py-20170902-10:00', 'Status': {'Timeline': timeline}},
+            {'Name': 'report_daily_nonprod_1504346400.py-20170902-10:00', 'Status': {'Timeline': timeline}},
+            {'Name': 'report_prod_1504346400.py-20170902-10:00', 'Status': {'Timeline': timeline}},
+        ]
+        metadata = {
+            'generated-etls/report_nonprod_1504346400.py': {'input-bytes': '1000', 'cores': '8'},
+            'generated-etls/report_daily_nonprod_1504346400.py': {'input-bytes': '5000', 'cores': '4'},
+            'generated-etls/report_prod_1504346400.py': {'input-bytes': '7000', 'cores': '2'},
+        }
+        runs = self.planner.get_historical_runs(FakeEMRConnection(steps), 'j-1', None, FakeS3Manager(metadata),
+                                                'etl-bucket', 'report.py', 'nonprod')
+        self.assertEqual(runs, [(1000, 8, 900.0)])
+
+
+    def test_instance_plan_picks_smallest_fitting_type(self):
+        """Test routine instance_plan_picks_smallest_fitting_type"""
+        self.assertEqual(self.planner.get_instance_plan(6), ('m4.large', 3))
+        self.assertEqual(self.planner.get_instance_plan(20), ('m4.2xlarge', 3))
+
+
+    def test_instance_plan_capped_at_max_instance_count(self):
+        """Test routine instance_plan_capped_at_max_instance_count"""
+        self.assertEqual(self.planner.get_instance_plan(1000), ('m4.10xlarge', 4))
+
+
+    @mock_s3
+    def test_input_size_sums_s3_prefixes(self):
+        """Test routine input_size_sums_s3_prefixes"""
+        conn_s3 = boto3.resource('s3', region_name='us-east-1')
+        conn_s3.create_bucket(Bucket='input-bucket')
+        conn_s3.Object('input-bucket', 'csv/part-0.csv').put(Body=b'a' * 300)
+        conn_s3.Object('input-bucket', 'csv/part-1.csv').put(Body=b'a' * 200)
+        conn_s3.Object('input-bucket', 'other/part-0.csv').put(Body=b'a' * 100)
+
+        source = {'__input_path__': 's3://input-bucket/csv/', '__run_date__': '2017-09-02'}
+        self.assertEqual(self.planner.get_input_size(conn_s3, aws.S3Manager(), source), 500)
+
+
+    @mock_emr
+    def test_run_metadata_records_reused_cluster_cores(self):
+        """Test routine run_metadata_records_reused_cluster_cores"""
+        conn_emr = boto3.client('emr', region_name='us-east-1')
+        step = {'Name': 'running', 'ActionOnFailure': 'CONTINUE',
+                'HadoopJarStep': {'Jar': 'command-runner.jar', 'Args': ['spark-submit', 'job.py']}}
+        cluster_id = conn_emr.run_job_flow(
+            Name='test',
+            Instances={
+                'InstanceGroups': [
+                    {'Name': 'Master nodes', 'Market': 'ON_DEMAND', 'InstanceRole': 'MASTER',
+                     'InstanceType': 'm4.xlarge', 'InstanceCount': 1},
+                    {'Name': 'Slave nodes', 'Market': 'ON_DEMAND', 'InstanceRole': 'CORE',
+                     'InstanceType': 'm4.xlarge', 'InstanceCount': 2},
+                    {'Name': 'Task nodes', 'Market': 'ON_DEMAND', 'InstanceRole': 'TASK',
+                     'InstanceType': 'm4.xlarge', 'InstanceCount': 6},
+                ],
+                'KeepJobFlowAliveWhenNoSteps': True,
+            },
+            Steps=[step],
+            JobFlowRole='EMR_EC2_DefaultRole',
+            ServiceRole='EMR_DefaultRole',
+        )['JobFlowId']
+
+        # The plan asks for 3 nodes but a running step keeps the cluster at 8
+        planned_count = self.planner.get_instance_count(10, 'm4.xlarge')
+        aws.EMRInstance().resize_for_demand(conn_emr, cluster_id, planned_count, 'm4.xlarge')
+
+        metadata = self.planner.get_run_metadata(1000, self.planner.get_cluster_cores(conn_emr, cluster_id))
+        self.assertEqual(metadata, {'input-bytes': '1000', 'cores': '32'})
+
+
+if __name__ == '__main__':
+    unittest.main()